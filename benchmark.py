@@ -0,0 +1,602 @@
+"""Benchmark offline del tester: farm locale di proxy simulati e origini finte.
+
+Avvia in un processo separato una farm di proxy HTTP e SOCKS5 simulati (latenza,
+banda e modalità di errore configurabili) con le origini locali che sostituiscono
+windnew.newkso.ru, vavoo.to e lo speedtest di Hetzner, poi lancia app.py sotto
+gunicorn e guida /test end to end per ogni combinazione di backend, dimensione
+della lista e numero di worker. Per ogni scenario riporta proxy/secondo, latenza
+per proxy (p50/p99), RSS di picco, numero di thread e processi del server e i
+falsi negativi (proxy funzionanti dati per morti). Con --origin-rps l'origine
+risponde 429 oltre la frequenza indicata, come un'origine che ci limita.
+
+Esempio:
+    python benchmark.py --backends async,curl --sizes 500,2000 --workers 50,200
+
+Nessuna richiesta esce dalla macchina: tutto gira su indirizzi di loopback (127.0.0.0/8).
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import deque
+
+# Corpi delle origini finte, come quelli che i controlli del profilo 'bench' si aspettano
+M3U8_BODY = b'#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:6\n#EXTINF:6.0,\nsegment0.ts\n'
+VAVOO_BODY = b'{"url":"https://example.invalid/stream.m3u8"}'
+VAVOO_NOT_FOUND = b'{"error":"Not found"}'
+NOT_FOUND_BODY = b'404 Not Found: error'
+SPEED_CHUNK = b'\0' * 65536
+SPEED_SIZE = 1024 * 1024 * 1024
+THROTTLE_BODY = b'{"error": "429 Too Many Requests"}'
+
+# Modalità dei proxy simulati: ok, refuse (porta chiusa), hang (accetta e tace),
+# badhs (handshake non valido), 404 (lo stream risponde 404), vavoo404 (vavoo Not found)
+MODES = ('ok', 'refuse', 'hang', 'badhs', '404', 'vavoo404')
+DEFAULT_MIX = 'ok=0.7,refuse=0.1,hang=0.05,badhs=0.05,404=0.05,vavoo404=0.05'
+
+# --- Farm di proxy e origini ---
+
+async def read_head(reader):
+    """Request line e header di una richiesta HTTP, None se la connessione è chiusa"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        return None
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, _ = (lines[0].split(' ', 2) + ['', ''])[:3]
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return method, target, headers, head
+
+class OriginThrottle:
+    """Rate limit dell'origine finta: oltre rps richieste nell'ultimo secondo risponde 429"""
+    def __init__(self, rps=0):
+        self.rps = rps
+        self.hits = deque()
+
+    def limited(self):
+        if not self.rps:
+            return False
+        now = time.monotonic()
+        while self.hits and now - self.hits[0] > 1:
+            self.hits.popleft()
+        if len(self.hits) >= self.rps:
+            return True
+        self.hits.append(now)
+        return False
+
+origin_throttle = OriginThrottle()
+
+def origin_path(target):
+    """Percorso di una richiesta in forma assoluta (curl via proxy HTTP) o normale"""
+    if '://' in target:
+        target = '/' + target.split('://', 1)[1].partition('/')[2]
+    return target.split('?', 1)[0]
+
+async def respond(writer, status, body, keep_alive=True):
+    reason = {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests'}.get(status, 'OK')
+    extra = 'Retry-After: 1\r\n' if status == 429 else ''
+    writer.write(f'HTTP/1.1 {status} {reason}\r\nContent-Length: {len(body)}\r\nContent-Type: text/plain\r\n{extra}'
+                 f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n'.encode() + body)
+    await writer.drain()
+
+async def serve_origin(reader, writer, mode='ok'):
+    """Origine finta (anche inline nel tunnel dei proxy con risposte sbagliate)"""
+    try:
+        while True:
+            request = await read_head(reader)
+            if request is None:
+                return
+            _, target, headers, _ = request
+            path = origin_path(target)
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            if mode == 'ok' and not path.startswith('/speed') and origin_throttle.limited():
+                await respond(writer, 429, THROTTLE_BODY, keep_alive)
+            elif path.startswith('/m3u8'):
+                await respond(writer, 404, NOT_FOUND_BODY, keep_alive) if mode == '404' else \
+                    await respond(writer, 200, M3U8_BODY, keep_alive)
+            elif path.startswith('/vavoo'):
+                await respond(writer, 200, VAVOO_NOT_FOUND if mode == 'vavoo404' else VAVOO_BODY, keep_alive)
+            elif path.startswith('/speed'):
+                writer.write(f'HTTP/1.1 200 OK\r\nContent-Length: {SPEED_SIZE}\r\n'
+                             'Content-Type: application/octet-stream\r\nConnection: close\r\n\r\n'.encode())
+                sent = 0
+                while sent < SPEED_SIZE:
+                    writer.write(SPEED_CHUNK)
+                    await writer.drain()
+                    sent += len(SPEED_CHUNK)
+                return
+            else:
+                await respond(writer, 404, NOT_FOUND_BODY, keep_alive)
+            if not keep_alive:
+                return
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+async def relay(reader, writer, mbps=None):
+    """Copia i byte da reader a writer, limitando la banda a mbps se indicato"""
+    start = time.monotonic()
+    sent = 0
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+            if mbps:
+                sent += len(data)
+                delay = sent * 8 / (mbps * 1e6) - (time.monotonic() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+class ProxyFarm:
+    """Proxy HTTP e SOCKS5 simulati su due porte di ogni IP di loopback: il comportamento è nel nome utente.
+
+    Nome utente: '<modalità>-<latenza ms>-<Mbps>-<indice>'. La latenza ritarda la
+    risposta all'handshake, la banda limita il traffico dall'origine al client.
+    """
+
+    def __init__(self, hosts, dead_hosts=()):
+        self.hosts = hosts
+        self.dead_hosts = dead_hosts
+        self._blackholes = []
+        self.origin_port = self.http_port = self.socks_port = self.closed_port = None
+
+    async def _serve_all(self, handler):
+        """Server in ascolto sulla stessa porta di tutti gli IP della farm"""
+        for _ in range(20):
+            try:
+                server = await asyncio.start_server(handler, self.hosts, free_port(), backlog=4096)
+                return server.sockets[0].getsockname()[1]
+            except OSError:
+                continue
+        raise RuntimeError('nessuna porta libera comune agli IP della farm')
+
+    async def start(self):
+        origin = await asyncio.start_server(serve_origin, '127.0.0.1', 0, backlog=4096)
+        self.origin_port = origin.sockets[0].getsockname()[1]
+        self.http_port = await self._serve_all(self.handle_http)
+        self.socks_port = await self._serve_all(self.handle_socks)
+        # Sottoreti morte: socket in ascolto che non accettano mai, a coda piena i SYN
+        # vengono scartati e la connessione scade come verso una rete irraggiungibile
+        for host in self.dead_hosts:
+            for port in (self.http_port, self.socks_port):
+                blackhole = socket.socket()
+                blackhole.bind((host, port))
+                blackhole.listen(0)
+                self._blackholes.append(blackhole)
+        # Porta libera senza nessuno in ascolto: connessione rifiutata
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.closed_port = probe.getsockname()[1]
+
+    @staticmethod
+    def behaviour(username):
+        try:
+            mode, latency, mbps, _ = username.split('-', 3)
+            return mode, float(latency) / 1000, float(mbps)
+        except ValueError:
+            return 'ok', 0, None
+
+    async def tunnel(self, client_reader, client_writer, host, port, mode, mbps):
+        """Dopo l'handshake: inoltro verso l'origine oppure risposte sbagliate inline"""
+        if mode in ('404', 'vavoo404'):
+            await serve_origin(client_reader, client_writer, mode)
+            return
+        try:
+            origin_reader, origin_writer = await asyncio.open_connection(host, port)
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(relay(client_reader, origin_writer), relay(origin_reader, client_writer, mbps))
+
+    async def handle_http(self, reader, writer):
+        request = await read_head(reader)
+        if request is None:
+            writer.close()
+            return
+        method, target, headers, head = request
+        auth = headers.get('proxy-authorization', '')
+        username = ''
+        if auth.lower().startswith('basic '):
+            username = base64.b64decode(auth[6:]).decode(errors='replace').split(':', 1)[0]
+        mode, latency, mbps = self.behaviour(username)
+        if mode == 'hang':
+            await reader.read()
+            writer.close()
+            return
+        await asyncio.sleep(latency * random.uniform(0.5, 1.5))
+        if mode == 'badhs':
+            writer.write(b'garbage\r\n\r\n')
+            writer.close()
+            return
+        if method == 'CONNECT':
+            host, _, port = target.rpartition(':')
+            writer.write(b'HTTP/1.1 200 Connection established\r\n\r\n')
+            await writer.drain()
+            await self.tunnel(reader, writer, host, int(port), mode, mbps)
+            return
+        # Richiesta in forma assoluta (curl con URL http): si inoltra la richiesta già letta
+        if mode in ('404', 'vavoo404'):
+            await serve_origin(_Replay(head, reader), writer, mode)
+            return
+        try:
+            origin_reader, origin_writer = await asyncio.open_connection('127.0.0.1', self.origin_port)
+        except OSError:
+            writer.close()
+            return
+        origin_writer.write(head)
+        await asyncio.gather(relay(reader, origin_writer), relay(origin_reader, writer, mbps))
+
+    async def handle_socks(self, reader, writer):
+        try:
+            version, count = await reader.readexactly(2)
+            methods = await reader.readexactly(count)
+            username = ''
+            if 2 in methods:
+                writer.write(b'\x05\x02')
+                await writer.drain()
+                _, length = await reader.readexactly(2)
+                username = (await reader.readexactly(length)).decode(errors='replace')
+                length = (await reader.readexactly(1))[0]
+                await reader.readexactly(length)
+                mode, latency, mbps = self.behaviour(username)
+                if mode == 'hang':
+                    await reader.read()
+                    writer.close()
+                    return
+                await asyncio.sleep(latency * random.uniform(0.5, 1.5))
+                if mode == 'badhs':
+                    writer.write(b'\x07\x07')
+                    writer.close()
+                    return
+                writer.write(b'\x01\x00')
+            else:
+                mode, latency, mbps = self.behaviour(username)
+                writer.write(b'\x05\x00')
+            await writer.drain()
+            _, command, _, address_type = await reader.readexactly(4)
+            if address_type == 1:
+                host = socket.inet_ntoa(await reader.readexactly(4))
+            elif address_type == 3:
+                host = (await reader.readexactly((await reader.readexactly(1))[0])).decode()
+            else:
+                host = socket.inet_ntop(socket.AF_INET6, await reader.readexactly(16))
+            port = struct.unpack('!H', await reader.readexactly(2))[0]
+            writer.write(b'\x05\x00\x00\x01\x00\x00\x00\x00\x00\x00')
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            writer.close()
+            return
+        await self.tunnel(reader, writer, host, port, mode, mbps)
+
+class _Replay:
+    """Reader che restituisce prima una richiesta già letta e poi il resto dello stream"""
+    def __init__(self, head, reader):
+        self._head = head
+        self._reader = reader
+
+    async def readuntil(self, separator):
+        if self._head:
+            head, self._head = self._head, b''
+            return head
+        return await self._reader.readuntil(separator)
+
+def run_farm(ports_queue, hosts, dead_hosts, origin_rps=0):
+    """Entry point del processo della farm: pubblica le porte e serve per sempre"""
+    origin_throttle.rps = origin_rps
+
+    async def main():
+        farm = ProxyFarm(hosts, dead_hosts)
+        await farm.start()
+        ports_queue.put({'origin': farm.origin_port, 'http': farm.http_port,
+                         'socks': farm.socks_port, 'closed': farm.closed_port})
+        await asyncio.Event().wait()
+    asyncio.run(main())
+
+# --- Lista proxy e profilo di controllo ---
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(','):
+        mode, _, weight = part.partition('=')
+        if mode.strip() not in MODES:
+            raise ValueError(f'modalità sconosciuta: {mode} (valide: {", ".join(MODES)})')
+        mix[mode.strip()] = float(weight)
+    return mix
+
+def farm_hosts(subnets, hosts_per_subnet):
+    """IP di loopback della farm, hosts_per_subnet per ognuna delle sottoreti /24"""
+    return [f'127.0.{subnet + 1}.{host + 1}' for subnet in range(subnets) for host in range(hosts_per_subnet)]
+
+def build_proxy_list(size, ports, mix, latency_ms, mbps, socks_ratio, seed, hosts, dead_hosts):
+    """Righe della lista: il comportamento di ogni proxy è codificato nelle credenziali.
+
+    Come nelle liste pubbliche, le porte di uno stesso IP sono consecutive; sugli IP
+    in dead_hosts (sottoreti morte) le connessioni non si completano mai.
+    """
+    rng = random.Random(seed)
+    modes, weights = zip(*mix.items())
+    all_hosts = hosts + dead_hosts
+    lines = []
+    for index in range(size):
+        host = all_hosts[index * len(all_hosts) // size]
+        mode = 'dead' if host in dead_hosts else rng.choices(modes, weights)[0]
+        latency = max(1, round(rng.lognormvariate(0, 0.5) * latency_ms))
+        bandwidth = round(mbps * rng.uniform(0.5, 1.5), 1)
+        user = f'{mode}-{latency}-{bandwidth}-{index}:x'
+        # Le credenziali rendono unica ogni riga anche per i proxy sulla porta chiusa
+        scheme, port = ('socks5', ports['socks']) if rng.random() < socks_ratio else ('http', ports['http'])
+        lines.append(f'{scheme}://{user}@{host}:{ports["closed"] if mode == "refuse" else port}')
+    return lines
+
+def bench_profiles(origin_port, speedtest):
+    """Profilo 'bench' con gli stessi controlli di 'full' verso le origini locali"""
+    base = f'http://127.0.0.1:{origin_port}'
+    checks = [
+        {'name': 'm3u8', 'url': f'{base}/m3u8', 'body_not_contains': ['404', 'error'],
+         'fail_details': 'Risposta HTTP 404 o errore nel contenuto'},
+        {'name': 'vavoo', 'url': f'{base}/vavoo', 'body_not_equals': VAVOO_NOT_FOUND.decode(),
+         'fail_details': 'Risposta vavoo.to: Not found', 'error_details': 'Errore su vavoo.to'},
+    ]
+    if speedtest:
+        checks.append({'name': 'speedtest', 'kind': 'speed', 'url': f'{base}/speed'})
+    return {'bench': {'description': 'Farm locale del benchmark', 'checks': checks}}
+
+# --- Server e misure ---
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+def process_tree(root_pid):
+    """PID del processo e di tutti i discendenti (da /proc)"""
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    pids, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop()
+        pids.append(pid)
+        pending.extend(children.get(pid, ()))
+    return pids
+
+def sample_tree(root_pid):
+    """(RSS totale in byte, thread, processi) dell'albero del server"""
+    rss = threads = processes = 0
+    for pid in process_tree(root_pid):
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                status = dict(line.split(':', 1) for line in f if ':' in line)
+        except OSError:
+            continue
+        rss += int(status.get('VmRSS', '0 kB').split()[0]) * 1024
+        threads += int(status.get('Threads', '0'))
+        processes += 1
+    return rss, threads, processes
+
+class ResourceSampler(threading.Thread):
+    """Campiona l'albero del server durante uno scenario e tiene i picchi"""
+    def __init__(self, root_pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.root_pid = root_pid
+        self.interval = interval
+        self.peak = [0, 0, 0]
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.is_set():
+            if sys.platform.startswith('linux'):
+                self.peak = [max(a, b) for a, b in zip(self.peak, sample_tree(self.root_pid))]
+            self._done.wait(self.interval)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.peak
+
+class Server:
+    """app.py sotto gunicorn con un DATA_DIR temporaneo e il profilo del benchmark"""
+
+    def __init__(self, backend, args, profiles_path, data_dir):
+        self.port = free_port()
+        # Tutti i proxy della farm stanno in 127.0.0.0/24 dietro un'unica origine: i limiti
+        # di frequenza sono spenti salvo indicazione esplicita nell'ambiente
+        limits = {name: os.environ.get(name, '0') for name in ('ORIGIN_RATE_LIMIT', 'SUBNET_RATE_LIMIT')}
+        env = dict(os.environ, **limits, PROBE_BACKEND=backend, DATA_DIR=data_dir, CHECK_PROFILES_FILE=profiles_path,
+                   DEFAULT_CHECK_PROFILE='bench', MONITOR_ENABLED='0', RESULT_CACHE_ENABLED='0',
+                   REPUTATION_ENABLED='0', LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'))
+        command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{self.port}', '--workers', str(args.gunicorn_workers),
+                   '--threads', str(args.gunicorn_threads), '--worker-class', 'gthread', '--timeout', '600', 'app:app']
+        self.process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                                        stdout=subprocess.DEVNULL if args.quiet else None, stderr=subprocess.STDOUT if args.quiet else None)
+        self.base_url = f'http://127.0.0.1:{self.port}'
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                urllib.request.urlopen(self.base_url + '/profiles', timeout=2).read()
+                return
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('il server non è partito (gunicorn installato?)')
+                time.sleep(0.2)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+def proxy_mode(proxy_line):
+    credentials = proxy_line.split('://', 1)[-1].rpartition('@')[0]
+    return credentials.split('-', 1)[0] or None
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def probe_duration_ms(result):
+    """Durata del probe dai tempi per fase: pre-filtro più ogni controllo"""
+    timings = result.get('timings') or {}
+    total = 0.0
+    for phase, timing in timings.items():
+        if phase == 'handshake':
+            total += sum(timing.get(field, 0) for field in ('dns_ms', 'connect_ms', 'proxy_handshake_ms'))
+        else:
+            total += timing.get('total_ms', 0)
+    return total if timings else None
+
+def run_scenario(server, lines, workers):
+    """Invia la lista a /test, segue lo stream fino alla fine e raccoglie le misure"""
+    sampler = ResourceSampler(server.process.pid)
+    sampler.start()
+    start = time.monotonic()
+    request = urllib.request.Request(
+        f'{server.base_url}/test?max_workers={workers}&use_cache=0&use_reputation=0&profile=bench',
+        data='\n'.join(lines).encode(), headers={'Content-Type': 'text/plain'})
+    queued = json.load(urllib.request.urlopen(request, timeout=600))
+    if queued.get('error'):
+        raise RuntimeError(queued['error'])
+    # Frame BATCH non compressi: l'ultimo porta il totale dei completati
+    completed = 0
+    with urllib.request.urlopen(f'{server.base_url}{queued["stream_url"]}?batch=1&batch_ms=1000', timeout=600) as stream:
+        for raw in stream:
+            if raw.startswith(b'data: '):
+                frame = json.loads(raw[6:])
+                completed = frame.get('completed', completed)
+    wall = time.monotonic() - start
+    peak_rss, peak_threads, peak_processes = sampler.stop()
+
+    durations, statuses, after = [], {}, 0
+    false_negatives = 0
+    while True:
+        page = json.load(urllib.request.urlopen(
+            f'{server.base_url}{queued["results_url"]}?after={after}&limit=5000', timeout=60))
+        for result in page['results']:
+            status = 'THROTTLED' if result.get('throttled') else 'SKIPPED' if result.get('skipped') else result['status']
+            statuses[status] = statuses.get(status, 0) + 1
+            # Falso negativo: proxy 'ok' della farm (modalità nel nome utente) dato per morto
+            false_negatives += status == 'FAIL' and proxy_mode(result['proxy']) == 'ok'
+            duration = probe_duration_ms(result)
+            if duration is not None:
+                durations.append(duration)
+        if not page['results']:
+            break
+        after = page['next_after']
+    return {
+        'proxies': queued['total_proxies'],
+        'completed': completed,
+        'workers': workers,
+        'wall_seconds': round(wall, 2),
+        'proxies_per_second': round(completed / wall, 1) if wall else None,
+        'p50_ms': percentile(durations, 0.5),
+        'p99_ms': percentile(durations, 0.99),
+        'statuses': statuses,
+        'false_negatives': false_negatives,
+        'peak_rss_mb': round(peak_rss / (1024 * 1024), 1) if peak_rss else None,
+        'peak_threads': peak_threads or None,
+        'peak_processes': peak_processes or None,
+    }
+
+def format_row(backend, row):
+    p50 = '-' if row['p50_ms'] is None else f"{row['p50_ms']:.0f}"
+    p99 = '-' if row['p99_ms'] is None else f"{row['p99_ms']:.0f}"
+    return (f"{backend:6} {row['proxies']:>7} {row['workers']:>7} {row['wall_seconds']:>8} {row['proxies_per_second']:>8} "
+            f"{p50:>7} {p99:>7} {row['peak_rss_mb'] or '-':>8} {row['peak_threads'] or '-':>7} {row['peak_processes'] or '-':>5} "
+            f"{row['false_negatives']:>6}  "
+            + ' '.join(f'{status}={count}' for status, count in sorted(row['statuses'].items())))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--backends', default='async', help='backend dei probe separati da virgola (async, curl)')
+    parser.add_argument('--sizes', default='200,1000', help='dimensioni della lista separate da virgola')
+    parser.add_argument('--workers', default='50', help='max_workers per /test separati da virgola')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f'pesi delle modalità dei proxy (default {DEFAULT_MIX})')
+    parser.add_argument('--latency', type=float, default=30, help='latenza mediana di handshake dei proxy in ms')
+    parser.add_argument('--mbps', type=float, default=50, help='banda media dei proxy in Mbps')
+    parser.add_argument('--socks-ratio', type=float, default=0.3, help='frazione di proxy SOCKS5')
+    parser.add_argument('--no-speedtest', action='store_true', help='profilo senza speedtest')
+    parser.add_argument('--origin-rps', type=int, default=0,
+                        help='richieste/s oltre le quali l\'origine risponde 429 (0 = nessun limite)')
+    parser.add_argument('--subnets', type=int, default=8, help='sottoreti /24 di loopback con proxy attivi')
+    parser.add_argument('--hosts-per-subnet', type=int, default=8, help='IP per sottorete')
+    parser.add_argument('--dead-subnets', type=int, default=0, help='sottoreti aggiuntive irraggiungibili (timeout)')
+    parser.add_argument('--gunicorn-workers', type=int, default=1)
+    parser.add_argument('--gunicorn-threads', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', help='salva i risultati anche in questo file JSON')
+    parser.add_argument('--quiet', action='store_true', help='nasconde l\'output del server')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    hosts = farm_hosts(args.subnets, args.hosts_per_subnet)
+    dead_hosts = farm_hosts(args.subnets + args.dead_subnets, args.hosts_per_subnet)[len(hosts):]
+    ports_queue = multiprocessing.Queue()
+    farm = multiprocessing.Process(target=run_farm, args=(ports_queue, hosts, dead_hosts, args.origin_rps), daemon=True)
+    farm.start()
+    ports = ports_queue.get(timeout=30)
+    work_dir = tempfile.mkdtemp(prefix='proxytester-bench-')
+    profiles_path = os.path.join(work_dir, 'profiles.json')
+    with open(profiles_path, 'w', encoding='utf-8') as f:
+        json.dump(bench_profiles(ports['origin'], not args.no_speedtest), f)
+
+    print(f"Farm: {len(hosts)} IP in {args.subnets} sottoreti (+{args.dead_subnets} morte), origine :{ports['origin']}, "
+          f"HTTP :{ports['http']}, SOCKS5 :{ports['socks']}, chiusa :{ports['closed']}")
+    print(f"{'backend':6} {'proxy':>7} {'workers':>7} {'tempo s':>8} {'proxy/s':>8} {'p50 ms':>7} {'p99 ms':>7} "
+          f"{'RSS MB':>8} {'thread':>7} {'proc':>5} {'f.neg':>6}  esiti")
+    report = []
+    try:
+        for backend in args.backends.split(','):
+            data_dir = os.path.join(work_dir, backend)
+            server = Server(backend.strip(), args, profiles_path, data_dir)
+            try:
+                for size in (int(value) for value in args.sizes.split(',')):
+                    lines = build_proxy_list(size, ports, mix, args.latency, args.mbps, args.socks_ratio, args.seed,
+                                             hosts, dead_hosts)
+                    for workers in (int(value) for value in args.workers.split(',')):
+                        row = run_scenario(server, lines, workers)
+                        print(format_row(backend, row), flush=True)
+                        report.append(dict(row, backend=backend))
+            finally:
+                server.stop()
+    finally:
+        farm.terminate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'scenarios': report}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
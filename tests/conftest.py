@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Database e spool in una cartella temporanea: va impostato prima di importare app
+os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='proxytester-tests-')
+os.environ.setdefault('MONITOR_ENABLED', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+import app
+
+EXAMPLE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'check_profiles.example.json')
+
+
+def write_profiles(tmp_path, config):
+    path = tmp_path / 'profiles.json'
+    path.write_text(json.dumps(config), encoding='utf-8')
+    return str(path)
+
+
+def test_builtin_profiles_without_file(tmp_path):
+    profiles = app.load_check_profiles(str(tmp_path / 'assente.json'))
+    assert set(profiles) == {'full', 'streams', 'connectivity'}
+    assert [check.name for check in profiles['full'].checks] == ['m3u8', 'vavoo', 'speedtest']
+    assert profiles['connectivity'].checks == ()
+
+
+def test_example_file_loads():
+    profiles = app.load_check_profiles(EXAMPLE_FILE)
+    mirror = profiles['mirror']
+    assert mirror.handshake_url == 'http://127.0.0.1:8080/'
+    index, extra, speedtest = mirror.checks
+    assert index.expect_status == (200,) and index.body_contains == ('#EXTM3U',)
+    assert extra.required is False
+    # Uno speedtest non fa mai fallire il proxy
+    assert speedtest.kind == 'speed' and speedtest.required is False and speedtest.timeout == 3.0
+    assert profiles['quick'].handshake_url == profiles['quick'].checks[0].url
+
+
+def test_file_overrides_builtin(tmp_path):
+    path = write_profiles(tmp_path, {'full': {'checks': [{'name': 'solo', 'url': 'https://example.com/'}]}})
+    profiles = app.load_check_profiles(path)
+    assert [check.name for check in profiles['full'].checks] == ['solo']
+    assert profiles['full'].checks[0].headers == ()
+
+
+@pytest.mark.parametrize('check, message', [
+    ({'name': 'x', 'url': 'ftp://example.com/'}, 'URL non valido'),
+    ({'name': 'x', 'url': 'https://example.com/', 'kind': 'ping'}, 'tipo sconosciuto'),
+    ({'name': 'x', 'url': 'https://example.com/', 'colore': 'rosso'}, "Profilo 'rotto' non valido"),
+    ({'url': 'https://example.com/'}, "Profilo 'rotto' non valido"),
+])
+def test_invalid_profiles(tmp_path, check, message):
+    path = write_profiles(tmp_path, {'rotto': {'checks': [check]}})
+    with pytest.raises(ValueError, match=message):
+        app.load_check_profiles(path)
+
+
+def test_missing_default_profile(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'DEFAULT_CHECK_PROFILE', 'inesistente')
+    with pytest.raises(ValueError, match='DEFAULT_CHECK_PROFILE'):
+        app.load_check_profiles(write_profiles(tmp_path, {}))
+
+
+def test_check_response_failure():
+    check = app.make_check('c', 'https://example.com/', headers={'a': 1}, expect_status=['200'],
+                           body_contains=['#EXTM3U'], body_not_contains=['error'])
+    assert check.headers == (('a', '1'),)
+    assert app.check_response_failure(check, 200, '#extm3u\nsegment.ts') is None
+    assert app.check_response_failure(check, 404, '#EXTM3U') == 'c: status HTTP 404'
+    assert 'contenuto' in app.check_response_failure(check, 200, '#EXTM3U Error')
@@ -0,0 +1,38 @@
+import subprocess
+import uuid
+from datetime import datetime
+
+import app
+
+
+def test_handshake_error_fails_only_that_proxy(monkeypatch):
+    async def broken_stage(proxy_type, proxy_address, profile):
+        raise AttributeError("'StreamWriter' object has no attribute 'start_tls'")
+
+    monkeypatch.setattr(app, 'curl_handshake_stage', broken_stage)
+    session_id = uuid.uuid4().hex
+    app.session_state.create(session_id, running=True, start_time=datetime.now())
+    try:
+        result = app.test_proxy_line('https://1.2.3.4:443', session_id)
+    finally:
+        app.end_session(session_id)
+    assert result['status'] == 'FAIL' and result['stage'] == 'handshake'
+    assert 'start_tls' in result['details']
+    assert result['proxy'] == 'https://1.2.3.4:443'
+
+
+def test_curl_fetch_uses_configured_connect_timeout(monkeypatch):
+    commands = []
+
+    def fake_run(cmd, **kwargs):
+        commands.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stdout='#EXTM3U\n200', stderr='')
+
+    monkeypatch.setattr(app, 'PROXY_CONNECT_TIMEOUT', 3.5)
+    monkeypatch.setattr(app.subprocess, 'run', fake_run)
+    check = app.make_check('m3u8', 'https://origin.example/index.m3u8')
+    _, status, body = app.curl_fetch(check, 'socks5', '1.2.3.4:1080', 10)
+    assert (status, body) == (200, '#EXTM3U')
+    cmd = commands[0]
+    assert cmd[cmd.index('--connect-timeout') + 1] == '3.5'
+    assert cmd[cmd.index('--socks5-hostname') + 1] == '1.2.3.4:1080'
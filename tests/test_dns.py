@@ -0,0 +1,33 @@
+import asyncio
+
+import pytest
+
+import app
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+def test_parse_stub_hosts():
+    assert app.parse_stub_hosts(' Proxy.Example=10.0.0.1, 10.0.0.2 ; vuoto= ;') == {
+        'proxy.example': ['10.0.0.1', '10.0.0.2'], 'vuoto': []}
+
+
+def test_dns_cache_stub_mode():
+    cache = app.DnsCache(app.parse_stub_hosts('proxy.example=10.0.0.1'))
+
+    async def scenario():
+        assert await cache.resolve('192.0.2.7') == ['192.0.2.7']
+        first, second = await asyncio.gather(cache.resolve('PROXY.example'), cache.resolve('proxy.example'))
+        assert first == second == ['10.0.0.1']
+        assert await cache.resolve('proxy.example') == ['10.0.0.1']
+        for _ in range(2):
+            with pytest.raises(app.ProbeError, match='non risolvibile'):
+                await cache.resolve('altro.example')
+
+    run(scenario())
+    stats = cache.stats()
+    assert stats['stub_mode'] is True
+    assert (stats['lookups'], stats['shared_lookups'], stats['hits'], stats['negative_hits']) == (2, 1, 1, 1)
+    assert stats['pending_lookups'] == 0
@@ -0,0 +1,55 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+
+import app
+
+
+def leased_job(lines=2):
+    """Job con spool reale, sessione abbandonata da 20 minuti e lease di un esecutore"""
+    session_id = uuid.uuid4().hex
+    path, stats = app.spool_proxy_list(session_id, [f'10.8.0.{i}:80' for i in range(lines)])
+    job_id = uuid.uuid4().hex
+    app.job_ledger.create_job(job_id, session_id, path, stats['total_proxies'], 2, False)
+    old = datetime.now() - timedelta(minutes=20)
+    app.session_state.create(session_id, running=True, start_time=old, last_heartbeat=old, job_id=job_id)
+    assert app.job_ledger.claim(job_id, 'esecutore')
+    return app.job_ledger.get_job(job_id)
+
+
+def test_cleanup_keeps_spool_of_leased_job():
+    job = leased_job()
+    try:
+        app.cleanup_abandoned_sessions()
+        assert app.job_ledger.get_job(job['job_id'])['status'] == 'stopped'
+        assert app.session_state.get(job['session_id']) is None
+        # L'esecutore ha ancora il lease: lo spool resta finché non lo rilascia
+        assert os.path.exists(job['spool_path'])
+    finally:
+        app.remove_spool(job['spool_path'])
+
+
+def test_cleanup_removes_spool_without_lease():
+    job = leased_job()
+    app.job_ledger.release(job['job_id'], 'esecutore', 'interrupted')
+    app.cleanup_abandoned_sessions()
+    assert app.job_ledger.get_job(job['job_id'])['status'] == 'stopped'
+    assert not os.path.exists(job['spool_path'])
+
+
+def test_polling_job_status_keeps_session_alive():
+    job = leased_job()
+    try:
+        response = app.app.test_client().get(f"/jobs/{job['job_id']}")
+        assert response.status_code == 200
+        heartbeat = app.session_state.get(job['session_id'])['last_heartbeat']
+        assert datetime.now() - heartbeat < timedelta(minutes=1)
+        app.cleanup_abandoned_sessions()
+        assert app.job_ledger.get_job(job['job_id'])['status'] == 'running'
+    finally:
+        app.job_ledger.set_status(job['job_id'], 'stopped')
+        app.remove_spool(job['spool_path'])
+
+
+def test_unknown_job_status():
+    assert app.app.test_client().get('/jobs/inesistente').status_code == 404
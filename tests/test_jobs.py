@@ -0,0 +1,150 @@
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+import app
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    return app.JobLedger(str(tmp_path / 'jobs.db'))
+
+
+def new_job(ledger, total=3, spool_path='/nessuno'):
+    job_id = uuid.uuid4().hex
+    ledger.create_job(job_id, uuid.uuid4().hex, spool_path, total, 2, True, {'profile': 'full'})
+    return job_id
+
+
+def test_claim_is_exclusive_until_lease_expires(ledger, monkeypatch):
+    job_id = new_job(ledger)
+    assert ledger.claim(job_id, 'a')
+    assert not ledger.claim(job_id, 'b')
+    assert ledger.claim(job_id, 'a')
+    assert ledger.renew(job_id, 'a') and not ledger.renew(job_id, 'b')
+    assert job_id not in ledger.claimable_jobs(10)
+
+    monkeypatch.setattr(app, 'JOB_LEASE_SECONDS', -1)
+    assert ledger.claim(job_id, 'a')
+    assert job_id in ledger.claimable_jobs(10)
+    assert ledger.claim(job_id, 'b')
+
+
+def test_release_returns_final_status(ledger):
+    job_id = new_job(ledger)
+    ledger.claim(job_id, 'a')
+    assert ledger.release(job_id, 'b', 'done') is None
+    assert ledger.release(job_id, 'a', 'interrupted') == 'interrupted'
+    job = ledger.get_job(job_id)
+    assert job['lease_owner'] is None and job['lease_until'] == 0
+    assert job['options'] == {'profile': 'full'}
+    # Un job interrotto si può riprendere
+    assert ledger.claim(job_id, 'b')
+
+
+def test_release_keeps_stopped_status(ledger):
+    job_id = new_job(ledger)
+    ledger.claim(job_id, 'a')
+    ledger.set_status(job_id, 'stopped')
+    assert ledger.release(job_id, 'a', 'done') == 'stopped'
+    assert ledger.get_job(job_id)['status'] == 'stopped'
+    assert not ledger.claim(job_id, 'b')
+
+
+def test_done_state_for_resume(ledger):
+    job_id = new_job(ledger, total=4)
+    ledger.write_entries(job_id, [0, 1, 2], [(0, 1, '{"status": "FAIL"}'), (2, 2, '{"status": "SUCCESS"}')])
+    done, last_order, count = ledger.done_state(job_id, 4)
+    assert list(done) == [1, 0, 1, 0]
+    assert (last_order, count) == (2, 2)
+    assert [order for order, _ in ledger.iter_done(job_id, after_order=1)] == [2]
+
+
+def start_job(total_lines, monkeypatch, probe):
+    """Job reale su spool e registro globali con iter_probe_results sostituito da probe"""
+    session_id = uuid.uuid4().hex
+    path, stats = app.spool_proxy_list(session_id, [f'10.9.0.{i}:80' for i in range(total_lines)])
+    job_id = uuid.uuid4().hex
+    app.job_ledger.create_job(job_id, session_id, path, stats['total_proxies'], 2, False)
+    app.session_state.create(session_id, running=True, start_time=datetime.now(), job_id=job_id)
+    monkeypatch.setattr(app, 'iter_probe_results', probe)
+    monkeypatch.setattr(app, 'REPUTATION_ENABLED', False)
+    owner = 'test-owner'
+    assert app.job_ledger.claim(job_id, owner)
+    return app.job_ledger.get_job(job_id), owner
+
+
+def test_run_owned_job_stopped_elsewhere_cleans_up(monkeypatch):
+    def probe(session_id, items, max_workers, scheduler=None, keep_running=None):
+        for idx, line, _ in items:
+            # /stop da un altro worker a metà job
+            app.job_ledger.set_status(job['job_id'], 'stopped')
+            yield idx, {'proxy': line, 'status': 'FAIL', 'details': 'x', 'is_protocol_error': False}
+            return
+
+    job, owner = start_job(3, monkeypatch, probe)
+    list(app.run_owned_job(job, owner))
+    assert app.job_ledger.get_job(job['job_id'])['status'] == 'stopped'
+    assert not os.path.exists(job['spool_path'])
+    assert app.session_state.get(job['session_id']) is None
+
+
+def test_run_owned_job_interrupted_stays_resumable(monkeypatch):
+    def probe(session_id, items, max_workers, scheduler=None, keep_running=None):
+        for idx, line, _ in items:
+            yield idx, {'proxy': line, 'status': 'FAIL', 'details': 'x', 'is_protocol_error': False}
+            return
+
+    job, owner = start_job(3, monkeypatch, probe)
+    try:
+        list(app.run_owned_job(job, owner))
+        assert app.job_ledger.get_job(job['job_id'])['status'] == 'interrupted'
+        assert os.path.exists(job['spool_path'])
+        assert app.session_state.get(job['session_id'])['running'] is False
+        assert app.job_ledger.done_state(job['job_id'], job['total'])[2] == 1
+    finally:
+        app.remove_spool(job['spool_path'])
+
+
+def test_lease_renewed_without_results(monkeypatch):
+    monkeypatch.setattr(app, 'JOB_LEASE_SECONDS', 0.3)
+
+    def probe(session_id, items, max_workers, scheduler=None, keep_running=None):
+        # Probe lenti: nessun risultato per più di un lease
+        time.sleep(0.6)
+        assert not app.job_ledger.claim(job['job_id'], 'altro')
+        assert keep_running()
+        return iter(())
+
+    job, owner = start_job(2, monkeypatch, probe)
+    try:
+        list(app.run_owned_job(job, owner))
+    finally:
+        app.remove_spool(job['spool_path'])
+
+
+def test_lost_lease_leaves_session_to_new_owner(monkeypatch):
+    monkeypatch.setattr(app, 'JOB_LEASE_SECONDS', 0.3)
+
+    def probe(session_id, items, max_workers, scheduler=None, keep_running=None):
+        # Un altro worker prende il job (come dopo un lease scaduto)
+        app.job_ledger.release(job['job_id'], owner, 'interrupted')
+        assert app.job_ledger.claim(job['job_id'], 'altro')
+        deadline = time.monotonic() + 2
+        while keep_running() and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert not keep_running()
+        return iter(())
+
+    job, owner = start_job(2, monkeypatch, probe)
+    try:
+        list(app.run_owned_job(job, owner))
+        current = app.job_ledger.get_job(job['job_id'])
+        assert (current['status'], current['lease_owner']) == ('running', 'altro')
+        assert app.session_state.get(job['session_id'])['running'] is True
+        assert os.path.exists(job['spool_path'])
+    finally:
+        app.remove_spool(job['spool_path'])
@@ -0,0 +1,17 @@
+import app
+
+
+def pool(name, generation=1):
+    return {'name': name, 'profile': 'connectivity', 'interval': 60, 'evict_after': 3, 'generation': generation}
+
+
+def test_reload_skips_only_proxies_inflight_for_the_same_pool():
+    members = [(10.0, '1.2.3.4:80', 0), (20.0, '5.6.7.8:80', 1)]
+    schedule = app._PoolSchedule(pool('b'), members)
+    assert sorted(schedule.heap) == [(10.0, '1.2.3.4:80'), (20.0, '5.6.7.8:80')]
+
+    # Lo stesso proxy in volo per il pool 'a' non toglie il membro al pool 'b'
+    schedule.apply(pool('b', 2), members, {('a', '1.2.3.4:80'), ('b', '5.6.7.8:80')})
+    assert schedule.heap == [(10.0, '1.2.3.4:80')]
+    assert schedule.failures == {'1.2.3.4:80': 0, '5.6.7.8:80': 1}
+    assert schedule.generation == 2
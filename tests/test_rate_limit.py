@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+import app
+
+
+class FakeClock:
+    """Modulo time di app con monotonic() controllato dal test"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(app, 'time', clock)
+    monkeypatch.setattr(app, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setattr(app, 'ORIGIN_RATE_LIMIT', 10.0)
+    monkeypatch.setattr(app, 'ORIGIN_RATE_BURST', 2)
+    monkeypatch.setattr(app, 'SUBNET_RATE_LIMIT', 0.0)
+    return clock
+
+
+def test_token_bucket_refill():
+    bucket = app.TokenBucket(2, now=0.0)
+    assert bucket.reserve(10, 2, now=0.0) == 0.0
+    assert bucket.reserve(10, 2, now=0.0) == 0.0
+    # Burst esaurito: la prenotazione attende il proprio token
+    assert bucket.reserve(10, 2, now=0.0) == pytest.approx(0.1)
+    assert bucket.reserve(10, 2, now=0.0) == pytest.approx(0.2)
+    # Un secondo dopo il bucket è di nuovo pieno, mai oltre il burst
+    assert bucket.reserve(10, 2, now=1.0) == 0.0
+    assert bucket.tokens == pytest.approx(1.0)
+
+
+def test_origin_limiter_per_host(clock):
+    limiter = app.OriginRateLimiter()
+    url = 'https://origin.example/a.m3u8'
+    delays = [limiter.reserve(url, '10.0.0.0/24') for _ in range(4)]
+    assert delays == pytest.approx([0, 0, 0.1, 0.2])
+    # Host diverso, bucket separato
+    assert limiter.reserve('https://altro.example/', '10.0.0.0/24') == 0
+    clock.now += 0.5
+    assert limiter.reserve(url, '10.0.0.0/24') == 0
+
+
+def test_origin_limiter_subnet_bucket(clock, monkeypatch):
+    monkeypatch.setattr(app, 'ORIGIN_RATE_LIMIT', 0.0)
+    monkeypatch.setattr(app, 'SUBNET_RATE_LIMIT', 1.0)
+    monkeypatch.setattr(app, 'SUBNET_RATE_BURST', 1)
+    limiter = app.OriginRateLimiter()
+    assert limiter.reserve('https://a.example/', '10.0.0.0/24') == 0
+    assert limiter.reserve('https://b.example/', '10.0.0.0/24') == pytest.approx(1)
+    assert limiter.reserve('https://b.example/', '10.0.1.0/24') == 0
+
+
+def test_throttling_halves_rate_and_pauses(clock, monkeypatch):
+    monkeypatch.setattr(app, 'THROTTLE_BACKOFF_SECONDS', 2)
+    limiter = app.OriginRateLimiter()
+    url = 'https://origin.example/'
+    assert not limiter.observe(url, 'n1', 200, 'ok')
+    assert limiter.observe(url, 'n1', 429, '')
+    # Seconda risposta nella stessa finestra: un solo dimezzamento
+    assert limiter.observe(url, 'n1', 503, 'Rate limit exceeded')
+    assert limiter.stats()['hosts']['origin.example'] == {'rate': 5.0, 'factor': 0.5, 'strikes': 1}
+    assert limiter.reserve(url, 'n1') == pytest.approx(2)
+    assert limiter.reserve(url, 'n2') == 0
+    assert limiter.observe(url, 'n1', 200, '') is False
+    assert limiter.stats()['hosts']['origin.example']['factor'] == pytest.approx(0.52)
+
+
+@pytest.mark.parametrize('status, body, throttled', [
+    (429, '', True),
+    (503, 'Too Many Requests', True),
+    (404, 'not found', False),
+    (200, 'rate limit', False),
+])
+def test_origin_throttled(status, body, throttled):
+    assert app.origin_throttled(status, body) is throttled
+
+
+def test_retry_after_seconds():
+    assert app.retry_after_seconds(' 7 ') == 7.0
+    assert app.retry_after_seconds('Wed, 21 Oct 2015 07:28:00 GMT') is None
+    assert app.retry_after_seconds(None) is None
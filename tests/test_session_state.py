@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+
+import app
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def state(request, tmp_path):
+    if request.param == 'sqlite':
+        return app.SqliteSessionState(str(tmp_path / 'sessions.db'))
+    return app.RedisSessionState(app.InMemoryRedis())
+
+
+def test_create_get_update(state):
+    started = datetime(2024, 5, 1, 12, 0, 0)
+    state.create('s1', running=True, start_time=started, total_proxies=10, job_id='j1')
+    info = state.get('s1')
+    assert info['running'] is True
+    assert info['start_time'] == started
+    assert info['last_heartbeat'] is None
+    assert (info['total_proxies'], info['completed_count'] or 0, info['job_id']) == (10, 0, 'j1')
+
+    assert state.update('s1', running=False, completed_count=4)
+    info = state.get('s1')
+    assert info['running'] is False and info['completed_count'] == 4
+    assert not state.update('assente', running=False)
+    assert state.get('assente') is None
+
+
+def test_incr_and_delete(state):
+    state.create('s1', running=True, completed_count=0)
+    state.incr('s1', 'completed_count')
+    state.incr('s1', 'completed_count', 5)
+    state.incr('assente', 'completed_count')
+    assert state.get('s1')['completed_count'] == 6
+    assert state.get('assente') is None
+    state.delete('s1')
+    assert state.get('s1') is None
+
+
+def test_all_lists_sessions(state):
+    state.create('s1', running=True)
+    state.create('s2', running=False)
+    assert sorted(info['session_id'] for info in state.all()) == ['s1', 's2']
+    state.delete('s1')
+    assert [info['session_id'] for info in state.all()] == ['s2']
+
+
+def test_unknown_field_rejected(state):
+    with pytest.raises(KeyError):
+        state.create('s1', colore='rosso')
+
+
+def test_redis_expired_hash_leaves_index(monkeypatch):
+    client = app.InMemoryRedis()
+    state = app.RedisSessionState(client)
+    state.create('s1', running=True)
+    monkeypatch.setattr(app, 'SESSION_STATE_TTL', -1)
+    state.create('s2', running=True)
+    assert [info['session_id'] for info in state.all()] == ['s1']
+    assert client.smembers(state.INDEX_KEY) == {'s1'}
+
+
+def test_running_flags_expire_and_prune(monkeypatch):
+    monkeypatch.setattr(app, 'RUNNING_FLAG_PRUNE_INTERVAL', 10)
+    flags = app.RunningFlagCache(ttl=1)
+    flags.put('s1', True, now=100)
+    assert flags.get('s1', now=100.5) is True
+    assert flags.get('s1', now=101) is None
+    # Le voci scadute restano fino alla potatura successiva
+    flags.put('s2', False, now=105)
+    assert len(flags) == 2
+    flags.put('s3', True, now=flags._pruned_at + 10)
+    assert len(flags) == 1 and flags.get('s3', now=flags._pruned_at) is True
+    assert flags.pop('s3') == (True, flags._pruned_at + 1)
+    assert flags.pop('assente') is None
@@ -0,0 +1,106 @@
+import asyncio
+import struct
+
+import pytest
+
+import app
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+async def socks5_server(reader, writer):
+    """SOCKS5 senza autenticazione che accetta il CONNECT e poi fa da eco"""
+    _, count = await reader.readexactly(2)
+    await reader.readexactly(count)
+    writer.write(b'\x05\x00')
+    _, _, _, address_type = await reader.readexactly(4)
+    await reader.readexactly((await reader.readexactly(1))[0] if address_type == 3 else 4)
+    await reader.readexactly(2)
+    writer.write(b'\x05\x00\x00\x01' + bytes(4) + struct.pack('!H', 0))
+    writer.write(await reader.readline())
+    await writer.drain()
+    writer.close()
+
+
+async def http_proxy_server(reader, writer):
+    """Proxy HTTP: errore per le richieste non valide, tunnel di eco per CONNECT"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    if not head.startswith(b'CONNECT '):
+        writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+    else:
+        writer.write(b'HTTP/1.1 200 Connection established\r\n\r\n')
+        writer.write(await reader.readline())
+    await writer.drain()
+    writer.close()
+
+
+async def silent_server(reader, writer):
+    """Accetta la connessione e non risponde mai"""
+    await reader.read()
+
+
+@pytest.mark.parametrize('handler, protocol, connections', [
+    (socks5_server, 'socks5', 1),
+    (http_proxy_server, 'http', 2),
+])
+def test_sniff_proxy_protocol(handler, protocol, connections):
+    async def scenario():
+        accepted = []
+
+        async def counting(reader, writer):
+            accepted.append(1)
+            await handler(reader, writer)
+
+        server = await asyncio.start_server(counting, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        timing = {}
+        kind, reader, writer = await app.sniff_proxy_protocol(f'127.0.0.1:{port}', 'origin.example', 443, 2, timing)
+        writer.write(b'ping\n')
+        assert await asyncio.wait_for(reader.readline(), 2) == b'ping\n'
+        app.close_writer(writer)
+        server.close()
+        return kind, timing, len(accepted)
+
+    kind, timing, accepted = run(scenario())
+    assert kind == timing['protocol_sniffed'] == protocol
+    assert timing['sniff_connections'] == accepted == connections
+    assert 'proxy_handshake_ms' in timing
+
+
+def test_sniff_ambiguous_reply_falls_back_to_http():
+    async def scenario():
+        server = await asyncio.start_server(silent_server, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        timing = {}
+        try:
+            await asyncio.wait_for(app.sniff_proxy_protocol(f'127.0.0.1:{port}', 'origin.example', 443, 0.1, timing), 0.5)
+        except asyncio.TimeoutError:
+            pass
+        server.close()
+        return timing
+
+    timing = run(scenario())
+    # Seconda connessione per HTTP CONNECT, rimasta senza risposta
+    assert timing['connect_ms'] >= 0 and 'protocol_sniffed' not in timing
+
+
+async def slow_socks5_server(reader, writer):
+    await asyncio.sleep(0.3)
+    await socks5_server(reader, writer)
+
+
+def test_sniff_waits_for_slow_socks5():
+    async def scenario():
+        server = await asyncio.start_server(slow_socks5_server, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        timing = {}
+        kind, reader, writer = await app.sniff_proxy_protocol(f'127.0.0.1:{port}', 'origin.example', 443, 2, timing)
+        app.close_writer(writer)
+        await asyncio.sleep(0.05)
+        server.close()
+        return kind, timing
+
+    kind, timing = run(scenario())
+    assert kind == 'socks5' and timing['sniff_connections'] == 1
@@ -0,0 +1,72 @@
+import json
+import uuid
+import zlib
+
+import pytest
+
+import app
+
+
+def parse_events(text):
+    """Eventi SSE come dizionari campo -> valore, commenti esclusi"""
+    events = []
+    for block in text.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.split('\n') if line and not line.startswith(':'))
+        if fields:
+            events.append(fields)
+    return events
+
+
+@pytest.mark.parametrize('encoding, wbits', [('gzip', 31), ('deflate', 15)])
+def test_compress_events_flushes_each_event(encoding, wbits):
+    events = [f'id: {i}\ndata: {{"n": {i}}}\n\n' for i in range(3)]
+    chunks = list(app.compress_events(iter(events), encoding))
+    assert len(chunks) == len(events) + 1
+    decompressor = zlib.decompressobj(wbits)
+    # Ogni chunk si decomprime subito nel proprio evento, senza attendere la fine dello stream
+    for event, chunk in zip(events, chunks):
+        assert decompressor.decompress(chunk).decode() == event
+    assert decompressor.decompress(chunks[-1]) == b''
+    assert decompressor.eof
+
+
+def make_done_job(results):
+    job_id = uuid.uuid4().hex
+    app.job_ledger.create_job(job_id, uuid.uuid4().hex, '/nessuno', len(results), 1, False)
+    app.job_ledger.write_entries(job_id, [], [(idx, idx + 1, json.dumps(result)) for idx, result in enumerate(results)])
+    app.job_ledger.set_status(job_id, 'done')
+    return job_id
+
+
+def result(status, proxy):
+    return {'status': status, 'proxy': proxy, 'details': 'x', 'is_protocol_error': False, 'stage': 'checks'}
+
+
+def test_sse_job_batches_framing():
+    results = [result('SUCCESS', 'p0'), result('FAIL', 'p1'), result('FAIL', 'p2'), result('SUCCESS', 'p3'),
+               result('FAIL', 'p4')]
+    job_id = make_done_job(results)
+    frames = parse_events(''.join(app.sse_job_batches(job_id, max_results=2)))
+    assert [frame['id'] for frame in frames] == ['2', '4', '5']
+
+    data = [json.loads(frame['data']) for frame in frames]
+    assert all(frame['status'] == 'BATCH' and frame['total'] == 5 for frame in data)
+    assert [frame['completed'] for frame in data] == [2, 4, 5]
+    assert [(frame['working'], frame['failed']) for frame in data] == [(1, 1), (2, 2), (2, 3)]
+    proxy = data[0]['fields'].index('proxy')
+    assert [row[proxy] for frame in data for row in frame['rows']] == ['p0', 'p1', 'p2', 'p3', 'p4']
+
+
+def test_sse_job_batches_resume_after_order():
+    job_id = make_done_job([result('SUCCESS', 'p0'), result('FAIL', 'p1'), result('FAIL', 'p2')])
+    frames = parse_events(''.join(app.sse_job_batches(job_id, after_order=2)))
+    assert len(frames) == 1 and frames[0]['id'] == '3'
+    data = json.loads(frames[0]['data'])
+    assert (data['completed'], data['failed'], len(data['rows'])) == (3, 1, 1)
+
+
+def test_sse_job_events_ids():
+    job_id = make_done_job([result('SUCCESS', 'p0'), result('FAIL', 'p1')])
+    events = parse_events(''.join(app.sse_job_events(job_id)))
+    assert [event.get('id') for event in events] == ['1', '2', None]
+    assert json.loads(events[-1]['data'])['status'] == 'STAGES'
@@ -0,0 +1,83 @@
+import gzip
+import io
+
+import pytest
+
+import app
+
+
+def lines(data, **kwargs):
+    return list(app.iter_stream_lines(io.BytesIO(data), **kwargs))
+
+
+def test_iter_stream_lines_across_chunks():
+    data = b'1.2.3.4:80\r\n\n  5.6.7.8:8080  \n9.9.9.9:1'
+    assert lines(data, chunk_size=3) == ['1.2.3.4:80', '5.6.7.8:8080', '9.9.9.9:1']
+
+
+@pytest.mark.parametrize('chunk_size', [7, 1000, 65536])
+def test_overlong_line_is_dropped_whole(chunk_size):
+    long_line = b'x' * (app.MAX_PROXY_LINE_LENGTH * 3) + b':80'
+    data = b'1.2.3.4:80\n' + long_line + b'\n5.6.7.8:80\n'
+    assert lines(data, chunk_size=chunk_size) == ['1.2.3.4:80', '5.6.7.8:80']
+
+
+def test_iter_stream_lines_size_limit():
+    with pytest.raises(ValueError, match='troppo grande'):
+        lines(b'1.2.3.4:80\n' * 100, chunk_size=64, max_bytes=500)
+
+
+def test_text_stream_reads_in_chunks():
+    stream = app._TextStream('1.2.3.4:80\nè:1\n')
+    assert stream.read(4) == b'1.2.'
+    assert stream.read() == '3.4:80\nè:1\n'.encode()
+    assert stream.read(10) == b''
+
+
+def upload(**kwargs):
+    """Lista acquisita dall'endpoint /test come spool; restituisce le righe o la risposta d'errore"""
+    captured = {}
+
+    def fake_spool(session_id, proxy_lines):
+        captured['lines'] = list(proxy_lines)
+        raise ValueError('fine del test')
+
+    client = app.app.test_client()
+    original = app.spool_proxy_list
+    app.spool_proxy_list = fake_spool
+    try:
+        response = client.post('/test', **kwargs)
+    finally:
+        app.spool_proxy_list = original
+    return captured.get('lines'), response
+
+
+def test_upload_sources():
+    assert upload(data={'proxies': '1.2.3.4:80\n5.6.7.8:80'})[0] == ['1.2.3.4:80', '5.6.7.8:80']
+    assert upload(data={'proxies_file': (io.BytesIO(gzip.compress(b'1.2.3.4:80\n')), 'lista.txt.gz')})[0] == ['1.2.3.4:80']
+    assert upload(data=b'1.2.3.4:80\n', content_type='text/plain')[0] == ['1.2.3.4:80']
+
+
+def test_oversized_form_field_rejected(monkeypatch):
+    monkeypatch.setattr(app, 'MAX_FORM_FIELD_BYTES', 1024)
+    proxies, response = upload(data={'proxies': '1.2.3.4:80\n' * 200})
+    assert proxies is None
+    assert response.status_code == 413
+    assert 'proxies_file' in response.get_json()['error']
+
+
+def test_fingerprint_set_grows_without_losing_values():
+    seen = app.FingerprintSet(capacity=8)
+    values = [app.line_fingerprint(f'10.0.{i // 256}.{i % 256}:80') for i in range(1000)]
+    assert all(seen.add(value) for value in values)
+    assert len(seen) == 1000
+    assert not any(seen.add(value) for value in values)
+    assert len(seen) == 1000
+
+
+def test_fingerprint_set_colliding_slots():
+    seen = app.FingerprintSet(capacity=16)
+    # Stesso slot iniziale (value & mask): sondaggio lineare
+    assert seen.add(1) and seen.add(17) and seen.add(33)
+    assert not seen.add(17)
+    assert app.line_fingerprint('') != 0